@@ -0,0 +1,248 @@
+"""
+Admission control and load shedding for bursty endpoints.
+
+Every controlled request takes a slot from a shared pool sized to the worker
+threadpool and from its route's own concurrency limit. When no slot is free
+the request waits in a bounded queue; waiters are admitted in priority order
+(cheap reads before writes). Requests beyond a route's queue bound, or that
+wait longer than MAX_WAIT, get 503 with Retry-After instead of timing out.
+
+All bookkeeping runs on the event loop, so no locks are needed.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+READ = 0
+WRITE = 1
+
+TOTAL_SLOTS = 40  # matches the default anyio threadpool size
+MAX_WAIT = 5.0  # seconds a request may wait for a slot
+RETRY_AFTER = 2  # seconds suggested to shed clients
+
+
+@dataclass
+class RouteLimit:
+    name: str
+    limit: int
+    max_queue: int
+    priority: int
+    inflight: int = 0
+    waiting: int = 0
+    admitted: int = 0
+    shed: int = 0
+    timed_out: int = 0
+    max_wait_ms: float = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "priority": "read" if self.priority == READ else "write",
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "inflight": self.inflight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+            "max_wait_ms": round(self.max_wait_ms, 1),
+        }
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    route: RouteLimit = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of admitted."""
+
+    pass
+
+
+class AdmissionController:
+    def __init__(self, routes: Dict[Tuple[str, str], RouteLimit], total_slots: int = TOTAL_SLOTS,
+                 max_wait: float = MAX_WAIT):
+        self.routes = routes
+        self.total_slots = total_slots
+        self.max_wait = max_wait
+        self.inflight = 0
+        self._defaults = {
+            READ: RouteLimit("other reads", limit=16, max_queue=64, priority=READ),
+            WRITE: RouteLimit("other writes", limit=4, max_queue=16, priority=WRITE),
+        }
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    def route_for(self, method: str, path: str) -> RouteLimit:
+        route = self.routes.get((method, path))
+        if route:
+            return route
+        return self._defaults[READ if method in ("GET", "HEAD") else WRITE]
+
+    def _can_admit(self, route: RouteLimit) -> bool:
+        return self.inflight < self.total_slots and route.inflight < route.limit
+
+    def _admit(self, route: RouteLimit) -> None:
+        self.inflight += 1
+        route.inflight += 1
+        route.admitted += 1
+
+    async def acquire(self, route: RouteLimit) -> None:
+        """Wait for a slot for this route, or raise Overloaded."""
+        # Only bypass the queue if nobody of equal or higher priority is waiting
+        if self._can_admit(route) and not any(
+            w.priority <= route.priority and not w.future.done() for w in self._waiters
+        ):
+            self._admit(route)
+            return
+
+        if route.waiting >= route.max_queue:
+            route.shed += 1
+            raise Overloaded()
+
+        waiter = _Waiter(route.priority, next(self._seq), route, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        route.waiting += 1
+        started = time.perf_counter()
+        self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                waiter.future.cancel()
+                route.timed_out += 1
+                raise Overloaded()
+            # Admitted just as the timeout fired; keep the slot.
+        except asyncio.CancelledError:
+            # Client went away while waiting; give back a slot granted meanwhile.
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(route)
+            else:
+                waiter.future.cancel()
+            raise
+        finally:
+            route.waiting -= 1
+            route.max_wait_ms = max(route.max_wait_ms, (time.perf_counter() - started) * 1000)
+
+    def release(self, route: RouteLimit) -> None:
+        self.inflight -= 1
+        route.inflight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Admit waiters in priority order while slots are free."""
+        blocked = []
+        while self._waiters and self.inflight < self.total_slots:
+            waiter = heapq.heappop(self._waiters)
+            if waiter.future.done():
+                continue  # timed out
+            if waiter.route.inflight >= waiter.route.limit:
+                blocked.append(waiter)
+                continue
+            self._admit(waiter.route)
+            waiter.future.set_result(None)
+        for waiter in blocked:
+            heapq.heappush(self._waiters, waiter)
+
+    def stats(self) -> dict:
+        routes = list(self.routes.values()) + list(self._defaults.values())
+        return {
+            "total_slots": self.total_slots,
+            "inflight": self.inflight,
+            "waiting": sum(1 for w in self._waiters if not w.future.done()),
+            "routes": {route.name: route.stats() for route in routes},
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that applies an AdmissionController to HTTP requests."""
+
+    def __init__(self, app, controller: AdmissionController, exempt_paths: Tuple[str, ...] = ()):
+        self.app = app
+        self.controller = controller
+        self.exempt_paths = set(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        route = self.controller.route_for(scope["method"], scope["path"])
+        try:
+            await self.controller.acquire(route)
+        except Overloaded:
+            await _send_overloaded(send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route)
+
+
+async def _send_overloaded(send) -> None:
+    body = json.dumps({"detail": "Server is busy. Please try again shortly."}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(RETRY_AFTER).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+if __name__ == "__main__":
+    # Local burst check: a vote-opening burst against handlers that block a
+    # worker thread like file I/O does. Usage: python admission.py
+    async def _slow_app(scope, receive, send):
+        await asyncio.to_thread(time.sleep, 0.05 if scope["method"] == "GET" else 0.2)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def _request(app, method, path, results):
+        status = {}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        started = time.perf_counter()
+        await app({"type": "http", "method": method, "path": path}, receive, send)
+        results.append((method, status["code"], time.perf_counter() - started))
+
+    async def _burst():
+        controller = AdmissionController({
+            ("GET", "/api/votes"): RouteLimit("GET /api/votes", limit=16, max_queue=64, priority=READ),
+            ("POST", "/api/vote"): RouteLimit("POST /api/vote", limit=4, max_queue=16, priority=WRITE),
+        }, total_slots=20, max_wait=2.0)
+        app = AdmissionMiddleware(_slow_app, controller)
+        results = []
+        requests = [("GET", "/api/votes")] * 300 + [("POST", "/api/vote")] * 100
+        started = time.perf_counter()
+        await asyncio.gather(*(_request(app, m, p, results) for m, p in requests))
+        elapsed = time.perf_counter() - started
+
+        for method in ("GET", "POST"):
+            done = [r for r in results if r[0] == method]
+            ok = sorted(r[2] for r in done if r[1] == 200)
+            shed = [r[2] for r in done if r[1] == 503]
+            p95 = ok[int(len(ok) * 0.95) - 1] if ok else 0
+            print(f"{method}: {len(ok)} ok (p95 {p95 * 1000:.0f} ms), "
+                  f"{len(shed)} shed (max {max(shed, default=0) * 1000:.0f} ms)")
+        print(f"Total {elapsed:.2f}s")
+        print(json.dumps(controller.stats(), indent=2))
+
+    asyncio.run(_burst())
@@ -0,0 +1,41 @@
+"""
+Player name canonicalization.
+
+Score lines are matched to players through an index built from profiles.json:
+each player's name, nickname and optional "aliases" list, normalized once.
+Normalizing casefolds and strips accents, emoji and punctuation, so
+"Pepo", "pepo" and "Pepo 🏃" all resolve to "Pepo" with one dict lookup.
+"""
+import unicodedata
+from typing import Dict
+
+
+def normalize_name(name: str) -> str:
+    """Casefold, drop accents and replace anything but letters/digits with spaces."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    kept = "".join(
+        ch if unicodedata.category(ch)[0] in "LN" else " "
+        for ch in decomposed
+        if not unicodedata.combining(ch)
+    )
+    return " ".join(kept.casefold().split())
+
+
+def build_alias_index(profiles: Dict[str, dict]) -> Dict[str, str]:
+    """
+    Map normalized names, nicknames and aliases to canonical player names.
+    Player names win over another player's nickname or alias.
+    """
+    index: Dict[str, str] = {}
+    for name in profiles:
+        key = normalize_name(name)
+        if key:
+            index[key] = name
+
+    for name, profile in profiles.items():
+        candidates = [profile.get("nickname")] + list(profile.get("aliases") or [])
+        for alias in candidates:
+            if isinstance(alias, str) and normalize_name(alias):
+                index.setdefault(normalize_name(alias), name)
+
+    return index
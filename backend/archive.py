@@ -0,0 +1,212 @@
+"""
+Compact binary archives for finished seasons, read through mmap.
+
+File layout (little-endian):
+    header       32 bytes: magic "FCTA", version u16, flags u16,
+                 date count u32, player count u32, name blob size u32, padding
+    date table   date count x i32 (date ordinals, ascending)
+    player table player count x (u32 offset, u32 length) into the name blob
+    name blob    UTF-8 player names, padded to a multiple of 4 bytes
+    scores       date count x player count matrix, row per date, i16 or i32
+                 (flag bit 0), the type minimum where a player has no score
+
+Reads bisect the date table and unpack only the requested rows, so serving a
+range never parses or loads the whole file.
+"""
+import mmap
+import os
+import re
+import struct
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from storage import DATA_DIR
+
+ARCHIVE_DIR = DATA_DIR / "archives"
+ARCHIVE_SUFFIX = ".fcta"
+MAGIC = b"FCTA"
+VERSION = 1
+FLAG_INT32 = 1
+
+HEADER = struct.Struct("<4sHHIII12x")
+PLAYER_SLOT = struct.Struct("<II")
+SEASON_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class ArchiveError(Exception):
+    """Raised when an archive cannot be written or read."""
+
+    pass
+
+
+def archive_path(season: str) -> Path:
+    if not SEASON_NAME.match(season):
+        raise ArchiveError(f"Invalid season name: '{season}'")
+    return ARCHIVE_DIR / f"{season}{ARCHIVE_SUFFIX}"
+
+
+def list_archives() -> List[str]:
+    if not ARCHIVE_DIR.exists():
+        return []
+    return sorted(p.stem for p in ARCHIVE_DIR.glob(f"*{ARCHIVE_SUFFIX}"))
+
+
+def export_season(season: str, entries: List[dict]) -> dict:
+    """Freeze entries into a binary archive. Returns a summary of the file."""
+    if not entries:
+        raise ArchiveError("No entries to archive")
+
+    players: List[str] = []
+    seen = set()
+    for entry in entries:
+        for player in entry["scores"]:
+            if player not in seen:
+                seen.add(player)
+                players.append(player)
+
+    values = [score for entry in entries for score in entry["scores"].values()]
+    wide = max(values, default=0) > 0x7FFF or min(values, default=0) <= -0x8000
+    code, missing = ("i", -0x80000000) if wide else ("h", -0x8000)
+
+    names = [p.encode("utf-8") for p in players]
+    blob = b"".join(names)
+    blob += b"\0" * (-len(blob) % 4)
+
+    parts = [HEADER.pack(MAGIC, VERSION, FLAG_INT32 if wide else 0, len(entries), len(players), len(blob))]
+    parts.append(struct.pack(f"<{len(entries)}i", *(date.fromisoformat(e["date"]).toordinal() for e in entries)))
+    offset = 0
+    for name in names:
+        parts.append(PLAYER_SLOT.pack(offset, len(name)))
+        offset += len(name)
+    parts.append(blob)
+    row = struct.Struct(f"<{len(players)}{code}")
+    for entry in entries:
+        parts.append(row.pack(*(entry["scores"].get(p, missing) for p in players)))
+
+    path = archive_path(season)
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        for part in parts:
+            f.write(part)
+    os.replace(tmp, path)
+
+    return {
+        "season": season,
+        "dates": len(entries),
+        "players": len(players),
+        "bytes": path.stat().st_size,
+    }
+
+
+class SeasonArchive:
+    """Read-only view of an archive file backed by mmap."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, flags, self.n_dates, self.n_players, blob_size = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ArchiveError(f"Not a season archive: {path.name}")
+
+        self._dates_at = HEADER.size
+        players_at = self._dates_at + 4 * self.n_dates
+        blob_at = players_at + PLAYER_SLOT.size * self.n_players
+        self._scores_at = blob_at + blob_size
+
+        self.players = []
+        for i in range(self.n_players):
+            offset, length = PLAYER_SLOT.unpack_from(self._mm, players_at + i * PLAYER_SLOT.size)
+            self.players.append(self._mm[blob_at + offset:blob_at + offset + length].decode("utf-8"))
+
+        wide = flags & FLAG_INT32
+        self._code, self._width = ("i", 4) if wide else ("h", 2)
+        self._missing = -0x80000000 if wide else -0x8000
+
+    def _ordinal_at(self, i: int) -> int:
+        return struct.unpack_from("<i", self._mm, self._dates_at + 4 * i)[0]
+
+    def _bisect(self, ordinal: int, right: bool) -> int:
+        # Binary search the date table in place instead of materializing it.
+        lo, hi = 0, self.n_dates
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = self._ordinal_at(mid)
+            if value < ordinal or (right and value == ordinal):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def read(self, start: Optional[str] = None, end: Optional[str] = None,
+             players: Optional[List[str]] = None) -> Dict:
+        """Read entries in [start, end] for the given players, shaped like /api/scores."""
+        first = self._bisect(date.fromisoformat(start).toordinal(), right=False) if start else 0
+        last = self._bisect(date.fromisoformat(end).toordinal(), right=True) if end else self.n_dates
+        rows = max(last - first, 0)
+
+        columns = range(self.n_players)
+        if players is not None:
+            index = {p: i for i, p in enumerate(self.players)}
+            columns = [index[p] for p in players if p in index]
+
+        ordinals = struct.unpack_from(f"<{rows}i", self._mm, self._dates_at + 4 * first)
+        row_size = self._width * self.n_players
+        values = struct.unpack_from(
+            f"<{rows * self.n_players}{self._code}", self._mm, self._scores_at + row_size * first
+        )
+
+        entries = []
+        for r, ordinal in enumerate(ordinals):
+            row = values[r * self.n_players:(r + 1) * self.n_players]
+            entries.append({
+                "date": date.fromordinal(ordinal).isoformat(),
+                "scores": {self.players[c]: row[c] for c in columns if row[c] != self._missing},
+            })
+        return {"entries": entries}
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+_open_archives: Dict[str, SeasonArchive] = {}
+_open_lock = threading.Lock()  # a replaced archive is closed, so reads must not overlap the swap
+
+
+def get_open_archive_stats() -> dict:
+    """Report mapped archives and their sizes."""
+    with _open_lock:
+        return {season: {"dates": a.n_dates, "players": a.n_players} for season, a in _open_archives.items()}
+
+
+def open_season(season: str) -> SeasonArchive:
+    """
+    Get the mapped archive for a season, remapping if the file was re-exported.
+    Caller holds _open_lock; use read_season from request handlers.
+    """
+    path = archive_path(season)
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise ArchiveError(f"No archive for season '{season}'")
+
+    archive = _open_archives.get(season)
+    if archive is None or archive.mtime_ns != mtime_ns:
+        if archive is not None:
+            archive.close()
+            del _open_archives[season]
+        archive = SeasonArchive(path)
+        _open_archives[season] = archive
+    return archive
+
+
+def read_season(season: str, start: Optional[str] = None, end: Optional[str] = None,
+                players: Optional[List[str]] = None) -> Dict:
+    """Read a season's entries in [start, end] for the given players."""
+    with _open_lock:
+        return open_season(season).read(start, end, players)
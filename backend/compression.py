@@ -0,0 +1,111 @@
+"""
+Negotiated response compression with bodies cached per data revision.
+
+Large JSON payloads are serialized once per revision, and each encoding
+(brotli when the brotli package is installed, otherwise gzip) is compressed
+at most once per revision, so repeated reads cost a dict lookup. Each key
+has its own lock, so rebuilding one response never blocks reads of another.
+"""
+import gzip
+import json
+import threading
+from typing import Callable, Dict, Optional
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+MIN_COMPRESS_SIZE = 1024  # bytes; smaller bodies are sent as-is
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+
+# Entries are replaced, never mutated, so readers and stats can use them unlocked
+_cache: Dict[str, dict] = {}
+_key_locks: Dict[str, threading.Lock] = {}
+_key_locks_lock = threading.Lock()
+
+
+def _key_lock(key: str) -> threading.Lock:
+    with _key_locks_lock:
+        return _key_locks.setdefault(key, threading.Lock())
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> set:
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best supported encoding the client accepts, or None."""
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _is_ready(cached: Optional[dict], revision: str, encoding: Optional[str]) -> bool:
+    """True if cached holds this revision's body in the encoding it will be sent with."""
+    if cached is None or cached["revision"] != revision:
+        return False
+    return encoding is None or encoding in cached or len(cached["identity"]) < MIN_COMPRESS_SIZE
+
+
+def cached_json_response(request: Request, key: str, revision: str, build: Callable[[], object]) -> Response:
+    """
+    Serve build()'s JSON for this revision, compressed when the client accepts it.
+    build() only runs when the revision for key changes.
+    """
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    cached = _cache.get(key)
+    if not _is_ready(cached, revision, encoding):
+        # Concurrent requests for the same key wait here and reuse the result
+        with _key_lock(key):
+            cached = _cache.get(key)
+            if cached is None or cached["revision"] != revision:
+                body = json.dumps(build(), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+                cached = {"revision": revision, "identity": body}
+                _cache[key] = cached
+            if not _is_ready(cached, revision, encoding):
+                cached = {**cached, encoding: _compress(cached["identity"], encoding)}
+                _cache[key] = cached
+
+    body = cached["identity"]
+    if len(body) < MIN_COMPRESS_SIZE:
+        encoding = None
+    if encoding is not None:
+        body = cached[encoding]
+
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def get_cache_stats() -> dict:
+    return {
+        key: {encoding: len(body) for encoding, body in cached.items() if encoding != "revision"}
+        for key, cached in list(_cache.items())
+    }
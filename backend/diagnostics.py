@@ -0,0 +1,254 @@
+"""
+Runtime diagnostics: sampling CPU profiler, tracemalloc snapshots and spans.
+
+- The profiler samples every thread's stack with sys._current_frames(), so it
+  sees sync endpoints running in the threadpool (cProfile only sees the thread
+  that enabled it). Stacks parked in an idle wait (threadpool workers waiting
+  for work, the event loop in select) are counted but not recorded, so the
+  report shows threads doing work. It stops after a number of seconds or requests.
+- Memory snapshots use tracemalloc; each snapshot is diffed against the last.
+- Spans time decorated hot paths (load_data, parse_message, save_data). When
+  disabled, a decorated call costs one boolean check.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from functools import wraps
+from typing import Dict, List, Optional
+
+DEFAULT_INTERVAL = 0.005  # seconds between profiler samples
+MAX_PROFILE_SECONDS = 120
+TOP_N = 25
+
+# (file suffix, function) of leaf frames where a thread is blocked waiting for work
+IDLE_FRAMES = {
+    ("threading.py", "wait"),  # Condition/Event.wait, e.g. anyio workers in queue.get
+    ("queue.py", "get"),
+    ("selectors.py", "select"),  # event loop waiting for I/O
+    (os.path.join("concurrent", "futures", "thread.py"), "_worker"),  # to_thread workers
+}
+
+
+# Spans
+
+spans_enabled = False
+_span_stats: Dict[str, dict] = {}
+_span_lock = threading.Lock()
+
+
+def traced(name: str):
+    """Record call count and timings for a function while spans are enabled."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not spans_enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record_span(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def _record_span(name: str, elapsed: float) -> None:
+    with _span_lock:
+        stats = _span_stats.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += elapsed * 1000
+        stats["max_ms"] = max(stats["max_ms"], elapsed * 1000)
+
+
+def set_spans_enabled(enabled: bool, reset: bool = False) -> None:
+    global spans_enabled
+    spans_enabled = enabled
+    if reset:
+        with _span_lock:
+            _span_stats.clear()
+
+
+def get_span_stats() -> dict:
+    with _span_lock:
+        spans = {
+            name: {
+                "count": s["count"],
+                "total_ms": round(s["total_ms"], 2),
+                "avg_ms": round(s["total_ms"] / s["count"], 3),
+                "max_ms": round(s["max_ms"], 2),
+            }
+            for name, s in _span_stats.items()
+        }
+    return {"enabled": spans_enabled, "spans": spans}
+
+
+# Sampling profiler
+
+class SamplingProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._reset(0, None, DEFAULT_INTERVAL)
+
+    def _reset(self, seconds: float, requests: Optional[int], interval: float) -> None:
+        self.seconds = seconds
+        self.requests_left = requests
+        self.interval = interval
+        self.samples = 0
+        self.idle_stacks = 0
+        self.requests_seen = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._self_counts: Counter = Counter()
+        self._total_counts: Counter = Counter()
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, requests: Optional[int] = None, interval: float = DEFAULT_INTERVAL) -> bool:
+        """Start sampling. Returns False if a profile is already running."""
+        with self._lock:
+            if self.active:
+                return False
+            self._reset(min(seconds, MAX_PROFILE_SECONDS), requests, interval)
+            self._stop.clear()
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def request_done(self) -> None:
+        """Count a finished request; stops the profile after the requested number."""
+        with self._lock:
+            self.requests_seen += 1
+            if self.requests_left is not None:
+                self.requests_left -= 1
+                if self.requests_left <= 0:
+                    self._stop.set()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        deadline = time.perf_counter() + self.seconds
+        while not self._stop.is_set() and time.perf_counter() < deadline:
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, frame in frames.items():
+                    if ident != own:
+                        self._sample(frame)
+                self.samples += 1
+            self._stop.wait(self.interval)
+        self.stopped_at = time.time()
+
+    def _sample(self, frame) -> None:
+        code = frame.f_code
+        if any(code.co_name == name and code.co_filename.endswith(suffix) for suffix, name in IDLE_FRAMES):
+            self.idle_stacks += 1
+            return
+
+        leaf = True
+        seen = set()
+        while frame is not None:
+            code = frame.f_code
+            key = f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+            if leaf:
+                self._self_counts[key] += 1
+                leaf = False
+            if key not in seen:  # count recursive functions once per stack
+                self._total_counts[key] += 1
+                seen.add(key)
+            frame = frame.f_back
+
+    def report(self, top: int = TOP_N) -> dict:
+        def rows(counter: Counter) -> List[dict]:
+            return [{"function": key, "samples": count} for key, count in counter.most_common(top)]
+
+        with self._lock:
+            top_self = rows(self._self_counts)
+            top_cumulative = rows(self._total_counts)
+
+        return {
+            "active": self.active,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "idle_stacks": self.idle_stacks,
+            "requests_seen": self.requests_seen,
+            "top_self": top_self,
+            "top_cumulative": top_cumulative,
+        }
+
+
+profiler = SamplingProfiler()
+
+
+class ProfilerRequestMiddleware:
+    """ASGI middleware that lets the profiler stop after N requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiler.active:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.request_done()
+
+
+# Memory snapshots
+
+_last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+
+def memory_snapshot(top: int = TOP_N) -> dict:
+    """
+    Start tracing on the first call; afterwards report the top allocation sites
+    and the change since the previous snapshot.
+    """
+    global _last_snapshot
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _last_snapshot = None
+        return {"tracing": True, "started": True, "top": [], "diff": []}
+
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    current, peak = tracemalloc.get_traced_memory()
+    result = {
+        "tracing": True,
+        "started": False,
+        "current_bytes": current,
+        "peak_bytes": peak,
+        "top": [
+            {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:top]
+        ],
+        "diff": [],
+    }
+    if _last_snapshot is not None:
+        result["diff"] = [
+            {"location": str(stat.traceback), "size_diff_bytes": stat.size_diff, "count_diff": stat.count_diff}
+            for stat in snapshot.compare_to(_last_snapshot, "lineno")[:top]
+        ]
+    _last_snapshot = snapshot
+    return result
+
+
+def stop_memory_tracing() -> None:
+    global _last_snapshot
+    _last_snapshot = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
@@ -0,0 +1,389 @@
+"""
+Queue-backed ingestion for automated score sources (e.g. Strava webhooks).
+
+Webhook requests only enqueue events into a local SQLite queue. A background
+asyncio worker drains the queue in batches, aggregates events per player/day
+and applies them to data.json with a single write per batch.
+
+Each event reports the daily gain a player earned on a date:
+    {"source": "strava", "event_id": "123", "player": "Josh",
+     "date": "2026-01-20", "points": 2}
+
+Events whose player matches no profile are held with status 'unknown_player'.
+They are released to the worker when profiles.json changes and the name now
+resolves (e.g. an admin added it as an alias), or when the source redelivers
+them and the name resolves.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import nullcontext
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from aliases import normalize_name
+from storage import DATA_DIR, get_alias_index, get_profiles_revision, load_data, save_data
+
+logger = logging.getLogger(__name__)
+
+QUEUE_FILE = DATA_DIR / "ingest_queue.db"
+ALLOWED_POINTS = {0, 1, 2, 4}
+HELD_STATUS = "unknown_player"
+
+BATCH_SIZE = 500
+POLL_INTERVAL = 1.0  # seconds between queue checks when idle
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 2.0  # seconds, doubled on each failed attempt
+BACKOFF_MAX = 300.0
+
+
+class EventQueue:
+    """Durable SQLite queue of ingestion events, deduped by (source, event_id)."""
+
+    def __init__(self, path: Path = QUEUE_FILE):
+        self.path = Path(path)
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source TEXT NOT NULL,
+                    event_id TEXT NOT NULL,
+                    player TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    points INTEGER NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    received_at REAL NOT NULL,
+                    UNIQUE (source, event_id)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS events_due ON events (status, next_attempt_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection (sqlite3 connections are not shareable)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, events: Iterable[dict], status: str = "pending") -> int:
+        """
+        Add events to the queue in one transaction.
+        Events stored with a status other than 'pending' are kept but never applied.
+        Returns the number of new events. Redelivered events are ignored, except
+        that a pending redelivery of a held event releases it.
+        """
+        events = list(events)
+        now = time.time()
+        rows = [
+            (e["source"], e["event_id"], e["player"], e["date"], e["points"], status, now)
+            for e in events
+        ]
+        conn = self._connect()
+        with conn:
+            before = conn.total_changes
+            if status == "pending":
+                conn.executemany(
+                    """
+                    UPDATE events SET player = ?, date = ?, points = ?, status = 'pending',
+                        next_attempt_at = 0, last_error = NULL
+                    WHERE source = ? AND event_id = ? AND status = ?
+                    """,
+                    [(e["player"], e["date"], e["points"], e["source"], e["event_id"], HELD_STATUS) for e in events],
+                )
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO events (source, event_id, player, date, points, status, received_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            return conn.total_changes - before
+
+    def release_held(self, aliases: Dict[str, str]) -> int:
+        """Move held events whose player now resolves back to pending. Returns how many."""
+        conn = self._connect()
+        held = conn.execute("SELECT id, player FROM events WHERE status = ?", (HELD_STATUS,)).fetchall()
+        updates = []
+        for event_id, player in held:
+            canonical = resolve_player(aliases, player)
+            if canonical:
+                updates.append((canonical, event_id))
+        with conn:
+            conn.executemany(
+                """
+                UPDATE events SET player = ?, status = 'pending', next_attempt_at = 0, last_error = NULL
+                WHERE id = ? AND status = ?
+                """,
+                [(player, event_id, HELD_STATUS) for player, event_id in updates],
+            )
+        return len(updates)
+
+    def fetch_due(self, limit: int = BATCH_SIZE) -> List[dict]:
+        """Get pending events whose retry time has come, oldest first."""
+        cursor = self._connect().execute(
+            """
+            SELECT id, player, date, points, attempts FROM events
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY id LIMIT ?
+            """,
+            (time.time(), limit),
+        )
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def mark(self, ids: List[int], status: str, error: Optional[str] = None) -> None:
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "UPDATE events SET status = ?, last_error = ? WHERE id = ?",
+                [(status, error, i) for i in ids],
+            )
+
+    def retry_later(self, events: List[dict], error: str) -> None:
+        """Reschedule events with exponential backoff, failing them after MAX_ATTEMPTS."""
+        now = time.time()
+        updates = []
+        for event in events:
+            attempts = event["attempts"] + 1
+            status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+            delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+            updates.append((status, attempts, now + delay, error, event["id"]))
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                """
+                UPDATE events SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?
+                WHERE id = ?
+                """,
+                updates,
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """Count events by status."""
+        rows = self._connect().execute(
+            "SELECT status, COUNT(*) FROM events GROUP BY status"
+        ).fetchall()
+        return {status: count for status, count in rows}
+
+    def players_with_status(self, status: str) -> List[str]:
+        """List the distinct player names of events with a status."""
+        rows = self._connect().execute(
+            "SELECT DISTINCT player FROM events WHERE status = ? ORDER BY player", (status,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+
+def resolve_player(aliases: Dict[str, str], name: str) -> Optional[str]:
+    """
+    Get the canonical player for a name, or None if it matches no profile.
+    Without profiles there is nothing to match against, so names are kept as sent.
+    """
+    if not aliases:
+        return name.strip()
+    return aliases.get(normalize_name(name))
+
+
+def aggregate_events(events: List[dict]) -> Dict[str, Dict[str, int]]:
+    """
+    Collapse events into {date: {player: points}}.
+    A day's gain is a single tier, so several events keep the highest one.
+    """
+    gains: Dict[str, Dict[str, int]] = {}
+    for event in events:
+        day = gains.setdefault(date.fromisoformat(event["date"]).isoformat(), {})
+        day[event["player"]] = max(day.get(event["player"], 0), event["points"])
+    return gains
+
+
+def apply_daily_gains(gains: Dict[str, Dict[str, int]]) -> List[str]:
+    """
+    Apply aggregated gains to data.json with a single write.
+    Like /api/update, only the latest entry's date, the day before it, or newer
+    dates can change. New dates carry the previous day's scores forward, and a
+    gain applied the day before the latest entry is carried into it. Existing
+    gains are never lowered, so admin entries for the same day win when higher.
+    Returns the dates that were skipped because they are too old.
+    """
+    data = load_data()
+    entries = data["entries"]
+    oldest = None
+    if entries:
+        oldest = (date.fromisoformat(entries[-1]["date"]) - timedelta(days=1)).isoformat()
+
+    stale = sorted(d for d in gains if oldest and d < oldest)
+    changed = False
+    for day in sorted(d for d in gains if d not in stale):
+        idx = next((i for i in range(len(entries) - 1, -1, -1) if entries[i]["date"] <= day), -1)
+        prev_scores = entries[idx - 1]["scores"] if idx > 0 else {}
+        if idx >= 0 and entries[idx]["date"] == day:
+            entry = entries[idx]
+        else:
+            prev_scores = entries[idx]["scores"] if idx >= 0 else {}
+            idx += 1
+            entry = {"date": day, "scores": dict(prev_scores)}
+            entries.insert(idx, entry)
+            changed = True
+
+        for player, points in gains[day].items():
+            target = prev_scores.get(player, 0) + points
+            current = entry["scores"].get(player, prev_scores.get(player, 0))
+            if entry["scores"].get(player, -1) < target:
+                entry["scores"][player] = target
+                changed = True
+                # Keep later entries' own gains unchanged
+                for later in entries[idx + 1:]:
+                    later["scores"][player] = later["scores"].get(player, current) + target - current
+
+    if changed:
+        save_data(data)
+    return stale
+
+
+class IngestWorker:
+    """Background asyncio task that drains an EventQueue into storage."""
+
+    def __init__(self, queue: EventQueue, write_lock: Optional[threading.Lock] = None):
+        self.queue = queue
+        self.write_lock = write_lock
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._profiles_revision: Optional[str] = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self) -> None:
+        """Wake the worker early. Safe to call from request threads."""
+        if self._loop and self._wakeup:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await asyncio.to_thread(self.process_batch)
+            except Exception:
+                # e.g. the queue database stayed locked; keep the worker alive
+                logger.exception("Ingest batch failed, retrying in %.1fs", POLL_INTERVAL)
+                await asyncio.sleep(POLL_INTERVAL)
+                continue
+            if processed < BATCH_SIZE:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    def process_batch(self) -> int:
+        """
+        Apply one batch of due events. Returns the number of events applied;
+        rejected and rescheduled events are not counted.
+        """
+        # Held events may resolve once profiles.json gains a name or alias
+        revision = get_profiles_revision()
+        if revision != self._profiles_revision:
+            self.queue.release_held(get_alias_index())
+            self._profiles_revision = revision
+
+        events = self.queue.fetch_due()
+        if not events:
+            return 0
+
+        # Retrying cannot make malformed or stale dates valid.
+        invalid = [e for e in events if not _is_iso_date(e["date"])]
+        if invalid:
+            self.queue.mark([e["id"] for e in invalid], "rejected", "Invalid date")
+            events = [e for e in events if _is_iso_date(e["date"])]
+            if not events:
+                return 0
+
+        try:
+            with self.write_lock or nullcontext():
+                stale = apply_daily_gains(aggregate_events(events))
+        except Exception as e:
+            self.queue.retry_later(events, str(e))
+            return 0
+
+        rejected = [e["id"] for e in events if date.fromisoformat(e["date"]).isoformat() in stale]
+        if rejected:
+            self.queue.mark(rejected, "rejected", "Date is before the day preceding the latest entry")
+        rejected_ids = set(rejected)
+        applied = [e["id"] for e in events if e["id"] not in rejected_ids]
+        self.queue.mark(applied, "done")
+        return len(applied)
+
+
+def _is_iso_date(value: str) -> bool:
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def fake_events(players: List[str], dates: List[str], count: int, source: str = "fake") -> List[dict]:
+    """Generate deterministic events for local testing, including redeliveries."""
+    points = sorted(ALLOWED_POINTS)
+    events = []
+    for i in range(count):
+        n = i // 2  # every event is delivered twice
+        events.append({
+            "source": source,
+            "event_id": str(n),
+            "player": players[n % len(players)],
+            "date": dates[(n // len(players)) % len(dates)],
+            "points": points[n % len(points)],
+        })
+    return events
+
+
+if __name__ == "__main__":
+    # Local burst check: enqueue fake events and drain them into a scratch DATA_DIR.
+    # Usage: DATA_DIR=/tmp/ingest-test python ingest.py
+    async def _demo():
+        queue = EventQueue()
+        worker = IngestWorker(queue)
+        worker.start()
+
+        events = fake_events(["Pepo", "Mene", "Josh", "Pocho"], ["2026-01-20", "2026-01-21"], 2000)
+        started = time.perf_counter()
+        added = sum(queue.enqueue(events[i:i + 100]) for i in range(0, len(events), 100))
+        worker.notify()
+        enqueued = time.perf_counter() - started
+
+        while queue.stats().get("pending"):
+            await asyncio.sleep(0.05)
+        await worker.stop()
+
+        print(f"Enqueued {added} new of {len(events)} events in {enqueued:.3f}s "
+              f"({len(events) / enqueued:.0f} events/s)")
+        print(json.dumps({"queue": queue.stats(), "data": load_data()}, indent=2))
+
+    asyncio.run(_demo())
@@ -1,19 +1,45 @@
+import hashlib
 import os
-from collections import defaultdict
+import threading
+from collections import OrderedDict, defaultdict
 from datetime import datetime, timedelta, date
 from zoneinfo import ZoneInfo
 from typing import Optional, Tuple
-from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi import FastAPI, HTTPException, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
+from admission import READ, WRITE, AdmissionController, AdmissionMiddleware, RouteLimit
+from archive import ArchiveError, SEASON_NAME, export_season, get_open_archive_stats, list_archives, read_season
+from compression import cached_json_response, get_cache_stats as get_compression_cache_stats
+from diagnostics import ProfilerRequestMiddleware, get_span_stats, memory_snapshot, profiler, set_spans_enabled, stop_memory_tracing
+from ingest import ALLOWED_POINTS, HELD_STATUS, EventQueue, IngestWorker, resolve_player
 from parser import parse_message, ParseError
-from storage import load_data, load_profiles, add_entry, save_data, get_latest_entry, get_previous_entry, entry_exists, load_votes, get_vote_counts, submit_vote, reset_votes, load_votes_history, archive_vote, create_vote, export_all_data
+from projections import simulate_standings
+from tally import METHODS, get_standings
+from storage import get_cache_stats, load_data, load_data_cached, load_data_versioned, load_profiles, add_entry, save_data, get_latest_entry, get_previous_entry, get_entry, get_data_revision, get_votes_revision, get_profiles_revision, get_alias_index, get_snapshot_index, load_votes, get_vote_counts, submit_vote, reset_votes, load_votes_history, archive_vote, create_vote, export_all_data
 
 PACIFIC_TZ = ZoneInfo("America/Los_Angeles")
 
 app = FastAPI(title="Fitness Challenge Tracker API")
 
+# Admission control for bursts (e.g. everyone voting at once). Added before
+# CORS so shed 503 responses still carry CORS headers.
+admission_controller = AdmissionController({
+    ("GET", "/api/votes"): RouteLimit("GET /api/votes", limit=16, max_queue=128, priority=READ),
+    ("GET", "/api/latest"): RouteLimit("GET /api/latest", limit=16, max_queue=64, priority=READ),
+    ("GET", "/api/scores"): RouteLimit("GET /api/scores", limit=8, max_queue=64, priority=READ),
+    ("POST", "/api/vote"): RouteLimit("POST /api/vote", limit=4, max_queue=32, priority=WRITE),
+    ("POST", "/api/update"): RouteLimit("POST /api/update", limit=2, max_queue=8, priority=WRITE),
+    ("POST", "/api/ingest/events"): RouteLimit("POST /api/ingest/events", limit=8, max_queue=256, priority=WRITE),
+})
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission_controller,
+    exempt_paths=("/api/health", "/api/admin/admission"),
+)
+app.add_middleware(ProfilerRequestMiddleware)
+
 # CORS for frontend - configurable via environment variable
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173").split(",")
 
@@ -49,26 +75,84 @@ def check_vote_rate_limit(ip: str) -> bool:
     return True
 
 
+# Recent /api/update results for replaying re-submitted pastes (in-memory, resets on restart)
+UPDATE_CACHE_SIZE = 64
+# Entries are cache key -> (payload fingerprint, data revision, response)
+recent_updates: "OrderedDict[str, tuple[str, str, UpdateResponse]]" = OrderedDict()
+update_lock = threading.Lock()
+
+
+def _update_fingerprint(message: str, force: bool, accept_unknown: bool) -> str:
+    """Hash the message (whitespace and blank lines normalized away) with its flags."""
+    lines = [" ".join(line.split()) for line in message.strip().split("\n")]
+    normalized = "\n".join(line for line in lines if line)
+    digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    return f"{digest}:{int(force)}:{int(accept_unknown)}"
+
+
+def _update_revision() -> str:
+    """Replays are valid while neither the data nor the player profiles changed."""
+    return f"{get_data_revision()}/{get_profiles_revision()}"
+
+
+# Historical snapshot responses keyed by (endpoint, snapshot date).
+# Answers for a past date only change when data.json is rewritten.
+snapshot_cache = {"revision": None, "results": {}}
+
+
+def _get_cached_snapshot(kind: str, revision: str, snapshot_date: str, build) -> dict:
+    """Get a cached result; revision must be the one the entries passed to build were loaded for."""
+    if snapshot_cache["revision"] != revision:
+        snapshot_cache["results"] = {}
+        snapshot_cache["revision"] = revision
+    key = (kind, snapshot_date)
+    if key not in snapshot_cache["results"]:
+        snapshot_cache["results"][key] = build()
+    return snapshot_cache["results"][key]
+
+
+def _resolve_snapshot_index(entries: list, as_of: Optional[str]) -> Optional[int]:
+    """
+    Find the index in entries to report for an optional as_of date.
+    Returns None if there is no entry on or before that date.
+    """
+    if as_of is None:
+        return len(entries) - 1 if entries else None
+
+    try:
+        # Entry dates are stored zero-padded, so bisect the normalized form.
+        as_of = date.fromisoformat(as_of).isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid date format: {as_of}")
+
+    return get_snapshot_index(as_of, entries)
+
+
 class UpdateRequest(BaseModel):
     message: str
     force: bool = False  # Set to True to overwrite existing entry
+    accept_unknown: bool = False  # Set to True to add unknown players as new players
 
 
 class UpdateResponse(BaseModel):
     success: bool
     date: str
     message: str
-    requires_confirmation: bool = False  # True if entry exists and force=False
+    requires_confirmation: bool = False  # True if the entry exists (and not force) or players are unknown (and not accept_unknown)
+    unknown_players: list[str] = []  # Names that match no profile name, nickname or alias
+    overwrite: bool = False  # True if confirming will overwrite the existing entry
 
 
 class VoteRequest(BaseModel):
     code: str
-    choice: str  # "ten", "twenty", or "thirty" (last place penalty amount)
+    choice: Optional[str] = None  # option key for plurality votes
+    choices: Optional[list[str]] = None  # approved keys, or keys in preference order for ranked votes
 
 
 class CreateVoteRequest(BaseModel):
     topic: str
     options: list  # [{"key": "option1", "label": "Option 1"}, ...]
+    method: str = "plurality"  # "plurality", "approval" or "ranked"
 
 
 def _compute_daily_gains(current_scores: dict, previous_scores: Optional[dict]) -> dict:
@@ -88,7 +172,7 @@ def _is_valid_date(date_str: str) -> Tuple[bool, str]:
     Returns (is_valid, error_message).
     """
     try:
-        entry_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        entry_date = date.fromisoformat(date_str)
     except ValueError:
         return False, f"Invalid date format: {date_str}"
 
@@ -120,32 +204,116 @@ def _calculate_age(birthday: Optional[str], today: date) -> Optional[int]:
 
 
 @app.get("/api/scores")
-def get_scores():
+def get_scores(request: Request):
     """Get all entries for charts."""
-    data = load_data()
-    return data
+    return cached_json_response(request, "scores", get_data_revision(), load_data_cached)
 
 
 @app.get("/api/latest")
-def get_latest():
-    """Get latest day's scores with daily gains."""
-    latest = get_latest_entry()
+def get_latest(as_of: Optional[str] = Query(None)):
+    """
+    Get latest day's scores with daily gains.
+    With as_of=YYYY-MM-DD, report the last entry on or before that date.
+    """
+    revision, data = load_data_versioned()
+    entries = data["entries"]
+    idx = _resolve_snapshot_index(entries, as_of)
 
-    if not latest:
+    if idx is None:
         return {"date": None, "scores": {}, "daily_gains": {}}
 
-    previous = get_previous_entry(latest["date"])
-    previous_scores = previous["scores"] if previous else None
+    return _get_cached_snapshot("latest", revision, entries[idx]["date"], lambda: _build_latest(entries, idx))
+
+
+def _build_latest(entries: list, idx: int) -> dict:
+    entry = entries[idx]
+    previous_scores = entries[idx - 1]["scores"] if idx > 0 else None
 
-    daily_gains = _compute_daily_gains(latest["scores"], previous_scores)
+    daily_gains = _compute_daily_gains(entry["scores"], previous_scores)
 
     return {
-        "date": latest["date"],
-        "scores": latest["scores"],
+        "date": entry["date"],
+        "scores": entry["scores"],
         "daily_gains": daily_gains,
     }
 
 
+@app.get("/api/stats")
+def get_stats(as_of: Optional[str] = Query(None)):
+    """
+    Get leaderboard standings (rank, gain, streak, points behind).
+    With as_of=YYYY-MM-DD, report standings as of that date.
+    """
+    revision, data = load_data_versioned()
+    entries = data["entries"]
+    idx = _resolve_snapshot_index(entries, as_of)
+
+    if idx is None:
+        return {"date": None, "players": []}
+
+    return _get_cached_snapshot("stats", revision, entries[idx]["date"], lambda: _build_stats(entries, idx))
+
+
+def _build_stats(entries: list, idx: int) -> dict:
+    entry = entries[idx]
+    scores = entry["scores"]
+    previous_scores = entries[idx - 1]["scores"] if idx > 0 else None
+    daily_gains = _compute_daily_gains(scores, previous_scores)
+    leader_score = max(scores.values()) if scores else 0
+
+    players = []
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    for position, (player, score) in enumerate(ranked):
+        # Tied players share the rank of the first player with that score
+        if position > 0 and score == ranked[position - 1][1]:
+            rank = players[-1]["rank"]
+        else:
+            rank = position + 1
+        players.append({
+            "name": player,
+            "rank": rank,
+            "score": score,
+            "daily_gain": daily_gains[player],
+            "streak": _compute_streak(entries, idx, player),
+            "points_behind": leader_score - score,
+        })
+
+    return {"date": entry["date"], "players": players}
+
+
+def _compute_streak(entries: list, idx: int, player: str) -> int:
+    """Count consecutive days with gains ending at entries[idx]."""
+    streak = 0
+    for i in range(idx, 0, -1):
+        current = entries[i]["scores"].get(player)
+        previous = entries[i - 1]["scores"].get(player)
+        if current is None or previous is None or current - previous <= 0:
+            break
+        streak += 1
+    return streak
+
+
+# Simulated standings are only recomputed when data.json changes
+projection_cache = {"revision": None, "result": None}
+projection_lock = threading.Lock()
+
+
+@app.get("/api/projections")
+def get_projections():
+    """Get simulated finish-position probabilities and expected payouts."""
+    with projection_lock:
+        revision = get_data_revision()
+        if projection_cache["revision"] != revision:
+            entries = load_data_cached()["entries"]
+            projection_cache["result"] = simulate_standings(entries) if entries else None
+            projection_cache["revision"] = revision
+
+    result = projection_cache["result"]
+    if result is None:
+        return {"date": None, "players": []}
+    return result
+
+
 @app.get("/api/profiles")
 def get_profiles():
     """Get player profile data with computed age."""
@@ -169,15 +337,56 @@ def get_profiles():
 def submit_update(
     request: UpdateRequest,
     x_api_key: str = Header(None),
+    idempotency_key: Optional[str] = Header(None),
 ):
-    """Submit a daily update. Requires API key."""
+    """
+    Submit a daily update. Requires API key.
+    Replays of a recent submission (same Idempotency-Key header and payload,
+    or same message while the data is unchanged) return the original response.
+    Reusing an Idempotency-Key with a different payload is rejected with 422.
+    """
     # Validate API key
     if x_api_key != API_KEY:
         raise HTTPException(status_code=401, detail="Invalid API key")
 
+    fingerprint = _update_fingerprint(request.message, request.force, request.accept_unknown)
+    client_key = idempotency_key.strip() if idempotency_key and idempotency_key.strip() else None
+    cache_key = f"key:{client_key}" if client_key else f"hash:{fingerprint}"
+
+    with update_lock:
+        cached = recent_updates.get(cache_key)
+        if cached:
+            cached_fingerprint, revision, response = cached
+            if client_key and cached_fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key was already used with a different message or flags.",
+                )
+            # Content-hash hits are only valid if nothing was written since.
+            if client_key or revision == _update_revision():
+                recent_updates.move_to_end(cache_key)
+                return response
+
+        response = _apply_update(request)
+
+        # A confirmation prompt is not a result; the client will retry with
+        # the confirmation flags, which must not collide with a stored client key.
+        if client_key and response.requires_confirmation:
+            return response
+
+        recent_updates[cache_key] = (fingerprint, _update_revision(), response)
+        recent_updates.move_to_end(cache_key)
+        while len(recent_updates) > UPDATE_CACHE_SIZE:
+            recent_updates.popitem(last=False)
+
+    return response
+
+
+def _apply_update(request: UpdateRequest) -> UpdateResponse:
+    """Parse, validate and store an update message."""
     # Parse the message
     try:
-        parsed = parse_message(request.message)
+        parsed = parse_message(request.message, aliases=get_alias_index())
     except ParseError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -229,12 +438,44 @@ def submit_update(
             )
 
     # Check if entry already exists
-    if entry_exists(parsed["date"]) and not request.force:
+    existing = get_entry(parsed["date"])
+    if existing and existing["scores"] == parsed["scores"]:
+        return UpdateResponse(
+            success=True,
+            date=parsed["date"],
+            message=f"Entry for {parsed['date']} is already up to date",
+        )
+
+    # Names that match no profile would silently start a new player, and
+    # overwriting needs its own confirmation; one prompt lists both.
+    unknown = parsed["unknown_players"] if not request.accept_unknown else []
+    overwrite = existing is not None and not request.force
+    if unknown and overwrite:
+        return UpdateResponse(
+            success=False,
+            date=parsed["date"],
+            message=f"Unknown players: {', '.join(unknown)}. Entry for {parsed['date']} already exists. Confirm to add them as new players and overwrite.",
+            requires_confirmation=True,
+            unknown_players=unknown,
+            overwrite=True,
+        )
+
+    if unknown:
+        return UpdateResponse(
+            success=False,
+            date=parsed["date"],
+            message=f"Unknown players: {', '.join(unknown)}. Confirm to add them as new players.",
+            requires_confirmation=True,
+            unknown_players=unknown,
+        )
+
+    if overwrite:
         return UpdateResponse(
             success=False,
             date=parsed["date"],
             message=f"Entry for {parsed['date']} already exists. Confirm to overwrite.",
             requires_confirmation=True,
+            overwrite=True,
         )
 
     # Store the entry
@@ -265,6 +506,7 @@ def get_votes():
         "vote_counts": votes.get("vote_counts", {}),
         "total_voters": len(votes.get("vote_codes", {})),
         "votes_cast": sum(1 for v in votes.get("vote_codes", {}).values() if v.get("voted") is not None),
+        "standings": get_standings(votes),
     }
 
 
@@ -279,7 +521,8 @@ def post_vote(vote_request: VoteRequest, request: Request):
             detail="Too many attempts. Please wait a minute before trying again."
         )
 
-    result = submit_vote(vote_request.code, vote_request.choice)
+    choices = vote_request.choices if vote_request.choices is not None else [vote_request.choice]
+    result = submit_vote(vote_request.code, [c for c in choices if c is not None])
 
     if "error" in result:
         if result["error"] == "invalid_code":
@@ -305,10 +548,9 @@ def reset_votes_endpoint(x_api_key: str = Header(None)):
 
 
 @app.get("/api/votes/history")
-def get_votes_history():
+def get_votes_history(request: Request):
     """Get history of all archived votes."""
-    history = load_votes_history()
-    return history
+    return cached_json_response(request, "votes_history", get_votes_revision(), load_votes_history)
 
 
 @app.post("/api/votes/archive")
@@ -338,12 +580,15 @@ def create_vote_endpoint(request: CreateVoteRequest, x_api_key: str = Header(Non
     if not request.options or len(request.options) < 2:
         raise HTTPException(status_code=400, detail="Must provide at least 2 options.")
 
+    if request.method not in METHODS:
+        raise HTTPException(status_code=400, detail=f"Method must be one of: {', '.join(METHODS)}.")
+
     # Validate options format
     for opt in request.options:
         if not isinstance(opt, dict) or "key" not in opt or "label" not in opt:
             raise HTTPException(status_code=400, detail="Each option must have 'key' and 'label'.")
 
-    result = create_vote(request.topic.strip(), request.options)
+    result = create_vote(request.topic.strip(), request.options, request.method)
 
     if "error" in result:
         if result["error"] == "vote_already_active":
@@ -353,15 +598,17 @@ def create_vote_endpoint(request: CreateVoteRequest, x_api_key: str = Header(Non
 
 
 @app.get("/api/backup")
-def get_backup(x_api_key: str = Header(None)):
+def get_backup(request: Request, x_api_key: str = Header(None)):
     """
     Export all data for backup. Requires API key.
     Returns JSON with all data files that can be used to restore state.
+    exported_at is the time of the first export since the data last changed.
     """
     if x_api_key != API_KEY:
         raise HTTPException(status_code=401, detail="Invalid API key")
 
-    return export_all_data()
+    revision = f"{get_data_revision()}/{get_votes_revision()}"
+    return cached_json_response(request, "backup", revision, export_all_data)
 
 
 class PatchEntryRequest(BaseModel):
@@ -369,6 +616,26 @@ class PatchEntryRequest(BaseModel):
     scores: dict[str, int]
 
 
+class PatchBatchRequest(BaseModel):
+    corrections: list[PatchEntryRequest]
+
+
+PATCH_ALLOWED_GAINS = {0, 1, 2, 4}
+
+
+def _find_gain_violations(prev_scores: dict, scores: dict) -> list[str]:
+    """List players whose gain from prev_scores to scores breaks the challenge rules."""
+    invalid = []
+    for player, score in scores.items():
+        if player in prev_scores:
+            gain = score - prev_scores[player]
+            if gain < 0:
+                invalid.append(f"{player}: {prev_scores[player]} -> {score} (decrease)")
+            elif gain not in PATCH_ALLOWED_GAINS:
+                invalid.append(f"{player}: +{gain} (invalid gain)")
+    return invalid
+
+
 @app.patch("/api/admin/patch-entry")
 def patch_entry(request: PatchEntryRequest, x_api_key: str = Header(None)):
     """
@@ -385,6 +652,12 @@ def patch_entry(request: PatchEntryRequest, x_api_key: str = Header(None)):
     except ValueError:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {request.date}")
 
+    with update_lock:
+        return _patch_entry(request)
+
+
+def _patch_entry(request: PatchEntryRequest) -> dict:
+    """Validate and save a single-entry patch. Caller holds update_lock."""
     data = load_data()
     entries = data["entries"]
 
@@ -398,33 +671,15 @@ def patch_entry(request: PatchEntryRequest, x_api_key: str = Header(None)):
     if target_idx is None:
         raise HTTPException(status_code=404, detail=f"No entry found for {request.date}")
 
-    ALLOWED_GAINS = {0, 1, 2, 4}
-
     # Validate gains against previous entry
     if target_idx > 0:
-        prev_scores = entries[target_idx - 1]["scores"]
-        invalid = []
-        for player, score in request.scores.items():
-            if player in prev_scores:
-                gain = score - prev_scores[player]
-                if gain < 0:
-                    invalid.append(f"{player}: {prev_scores[player]} -> {score} (decrease)")
-                elif gain not in ALLOWED_GAINS:
-                    invalid.append(f"{player}: +{gain} (invalid gain)")
+        invalid = _find_gain_violations(entries[target_idx - 1]["scores"], request.scores)
         if invalid:
             raise HTTPException(status_code=400, detail=f"Invalid vs previous day: {', '.join(invalid)}")
 
     # Validate gains against next entry
     if target_idx < len(entries) - 1:
-        next_scores = entries[target_idx + 1]["scores"]
-        invalid = []
-        for player, score in next_scores.items():
-            if player in request.scores:
-                gain = score - request.scores[player]
-                if gain < 0:
-                    invalid.append(f"{player}: {request.scores[player]} -> {score} (decrease)")
-                elif gain not in ALLOWED_GAINS:
-                    invalid.append(f"{player}: +{gain} (invalid gain)")
+        invalid = _find_gain_violations(request.scores, entries[target_idx + 1]["scores"])
         if invalid:
             raise HTTPException(status_code=400, detail=f"Invalid vs next day: {', '.join(invalid)}")
 
@@ -439,3 +694,375 @@ def patch_entry(request: PatchEntryRequest, x_api_key: str = Header(None)):
         "old_scores": old_scores,
         "new_scores": request.scores,
     }
+
+
+@app.patch("/api/admin/patch-batch")
+def patch_batch(request: PatchBatchRequest, x_api_key: str = Header(None)):
+    """
+    Patch many historical entries in one transaction. Bypasses date restrictions.
+    All corrections are applied in memory and every affected pair of adjacent
+    entries is validated together; either everything is saved in one write or
+    nothing is, with the full list of violations.
+    Requires API key. Not exposed in frontend or admin panel.
+    """
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    if not request.corrections:
+        raise HTTPException(status_code=400, detail="Must provide at least 1 correction.")
+
+    with update_lock:
+        return _patch_batch(request)
+
+
+def _patch_batch(request: PatchBatchRequest) -> dict:
+    """Validate and save all corrections in one write. Caller holds update_lock."""
+    data = load_data()
+    entries = data["entries"]
+    index_by_date = {entry["date"]: i for i, entry in enumerate(entries)}
+
+    violations = []
+    patched = {}  # entry index -> old scores
+    for correction in request.corrections:
+        try:
+            datetime.strptime(correction.date, "%Y-%m-%d")
+        except ValueError:
+            violations.append(f"{correction.date}: invalid date format")
+            continue
+
+        idx = index_by_date.get(correction.date)
+        if idx is None:
+            violations.append(f"{correction.date}: no entry found")
+            continue
+        if idx in patched:
+            violations.append(f"{correction.date}: duplicate correction")
+            continue
+
+        patched[idx] = entries[idx]["scores"]
+        entries[idx]["scores"] = correction.scores
+
+    # Each patched entry affects the pair with its predecessor and successor
+    pair_starts = set()
+    for idx in patched:
+        if idx > 0:
+            pair_starts.add(idx - 1)
+        if idx < len(entries) - 1:
+            pair_starts.add(idx)
+
+    for i in sorted(pair_starts):
+        invalid = _find_gain_violations(entries[i]["scores"], entries[i + 1]["scores"])
+        violations.extend(f"{entries[i + 1]['date']} vs {entries[i]['date']}: {v}" for v in invalid)
+
+    if violations:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "No entries were patched.", "violations": violations},
+        )
+
+    save_data(data)
+
+    return {
+        "success": True,
+        "patched": [
+            {
+                "date": entries[idx]["date"],
+                "old_scores": patched[idx],
+                "new_scores": entries[idx]["scores"],
+            }
+            for idx in sorted(patched)
+        ],
+    }
+
+
+# Webhook ingestion for automated score sources (see docs/STRAVA_INTEGRATION_PLAN.md)
+INGEST_TOKEN = os.getenv("INGEST_TOKEN", API_KEY)
+MAX_EVENTS_PER_REQUEST = 1000
+
+ingest_queue = EventQueue()
+ingest_worker = IngestWorker(ingest_queue, write_lock=update_lock)
+
+
+@app.on_event("startup")
+async def start_ingest_worker():
+    ingest_worker.start()
+
+
+@app.on_event("shutdown")
+async def stop_ingest_worker():
+    await ingest_worker.stop()
+
+
+class IngestEvent(BaseModel):
+    source: str
+    event_id: str
+    player: str
+    date: str
+    points: int
+
+
+class IngestRequest(BaseModel):
+    events: list[IngestEvent]
+
+
+@app.post("/api/ingest/events", status_code=202)
+def ingest_events(request: IngestRequest, x_ingest_token: str = Header(None)):
+    """
+    Enqueue score events from an automated source. Requires ingest token.
+    Events are applied to the scores by a background worker; redelivered
+    events (same source and event_id) are ignored. Events whose player matches
+    no profile are held and listed under unknown_players.
+    """
+    if x_ingest_token != INGEST_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid ingest token")
+
+    if len(request.events) > MAX_EVENTS_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_EVENTS_PER_REQUEST} events per request.")
+
+    invalid = []
+    dates = []
+    for event in request.events:
+        # Same window as /api/update: today or yesterday, stored zero-padded
+        try:
+            event_date = date.fromisoformat(event.date).isoformat()
+        except ValueError:
+            event_date = event.date
+        dates.append(event_date)
+        is_valid, error_msg = _is_valid_date(event_date)
+        if not is_valid:
+            invalid.append(f"{event.event_id}: {error_msg}")
+        elif event.points not in ALLOWED_POINTS:
+            invalid.append(f"{event.event_id}: +{event.points} (only 0, 1, 2, 4 allowed)")
+        elif not event.player.strip():
+            invalid.append(f"{event.event_id}: missing player")
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid events: {', '.join(invalid)}")
+
+    # Events for names that match no profile are held instead of starting a
+    # new player. Adding the spelling as an alias in profiles.json releases them.
+    aliases = get_alias_index()
+    matched, unmatched = [], []
+    for event, event_date in zip(request.events, dates):
+        player = resolve_player(aliases, event.player)
+        row = {
+            "source": event.source,
+            "event_id": event.event_id,
+            "player": player or event.player.strip(),
+            "date": event_date,
+            "points": event.points,
+        }
+        (matched if player else unmatched).append(row)
+
+    accepted = ingest_queue.enqueue(matched)
+    held = ingest_queue.enqueue(unmatched, status=HELD_STATUS)
+    if accepted:
+        ingest_worker.notify()
+
+    return {
+        "accepted": accepted,
+        "held": held,
+        "duplicates": len(request.events) - accepted - held,
+        "unknown_players": sorted({row["player"] for row in unmatched}),
+    }
+
+
+@app.get("/api/ingest/status")
+def ingest_status(x_api_key: str = Header(None)):
+    """
+    Get ingestion queue counts by status and the names of held events that
+    match no player. Requires API key.
+    """
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    return {
+        "events": ingest_queue.stats(),
+        "unknown_players": ingest_queue.players_with_status(HELD_STATUS),
+    }
+
+
+@app.get("/api/admin/admission")
+def admission_stats(x_api_key: str = Header(None)):
+    """Get admission control counters per route. Requires API key."""
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    return admission_controller.stats()
+
+
+# Finished seasons frozen into mmap-backed binary archives
+
+class ArchiveSeasonRequest(BaseModel):
+    season: str
+    start: Optional[str] = None  # inclusive, defaults to the first entry
+    end: Optional[str] = None  # inclusive, defaults to the last entry
+
+
+def _normalize_optional_date(value: Optional[str]) -> Optional[str]:
+    """Return the date in zero-padded ISO form (None stays None), or raise 400."""
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid date format: {value}")
+
+
+@app.post("/api/admin/archive-season")
+def archive_season(request: ArchiveSeasonRequest, x_api_key: str = Header(None)):
+    """
+    Freeze entries (optionally a date range) into a read-only season archive.
+    Requires API key.
+    """
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    if not SEASON_NAME.match(request.season):
+        raise HTTPException(status_code=400, detail="Season name may only use letters, digits, '-' and '_'.")
+    start = _normalize_optional_date(request.start)
+    end = _normalize_optional_date(request.end)
+
+    with update_lock:
+        entries = [
+            entry for entry in load_data()["entries"]
+            if (start is None or entry["date"] >= start)
+            and (end is None or entry["date"] <= end)
+        ]
+
+        try:
+            summary = export_season(request.season, entries)
+        except ArchiveError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return {"success": True, **summary}
+
+
+@app.get("/api/archives")
+def get_archives():
+    """List archived seasons."""
+    return {"seasons": list_archives()}
+
+
+@app.get("/api/archives/{season}/scores")
+def get_archived_scores(
+    season: str,
+    start: Optional[str] = Query(None),
+    end: Optional[str] = Query(None),
+    players: Optional[str] = Query(None),
+):
+    """
+    Get an archived season's entries, shaped like /api/scores.
+    Optional start/end (inclusive) and comma-separated players narrow the read.
+    """
+    start = _normalize_optional_date(start)
+    end = _normalize_optional_date(end)
+    player_list = [p.strip() for p in players.split(",") if p.strip()] if players else None
+
+    try:
+        return read_season(season, start, end, player_list)
+    except ArchiveError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+# Runtime diagnostics (admin only)
+
+class ProfileRequest(BaseModel):
+    seconds: float = 30  # capped at 120
+    requests: Optional[int] = None  # stop early after this many requests
+    interval_ms: float = 5
+
+
+class SpansRequest(BaseModel):
+    enabled: bool
+    reset: bool = False
+
+
+@app.post("/api/admin/diagnostics/profile")
+def start_profile(request: ProfileRequest, x_api_key: str = Header(None)):
+    """Start sampling CPU profiling for N seconds or the next N requests. Requires API key."""
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    if request.seconds <= 0 or request.interval_ms <= 0 or (request.requests is not None and request.requests <= 0):
+        raise HTTPException(status_code=400, detail="seconds, requests and interval_ms must be positive.")
+
+    if not profiler.start(request.seconds, request.requests, request.interval_ms / 1000):
+        raise HTTPException(status_code=409, detail="A profile is already running.")
+
+    return {"success": True}
+
+
+@app.get("/api/admin/diagnostics/profile")
+def get_profile(top: int = Query(25), x_api_key: str = Header(None)):
+    """Get the current or last sampling profile. Requires API key."""
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    return profiler.report(top)
+
+
+@app.post("/api/admin/diagnostics/profile/stop")
+def stop_profile(x_api_key: str = Header(None)):
+    """Stop a running profile early. Requires API key."""
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    profiler.stop()
+    return {"success": True}
+
+
+@app.get("/api/admin/diagnostics/memory")
+def get_memory_snapshot(top: int = Query(25), x_api_key: str = Header(None)):
+    """
+    Get top allocation sites and the diff since the last snapshot.
+    The first call starts tracemalloc. Requires API key.
+    """
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    return memory_snapshot(top)
+
+
+@app.post("/api/admin/diagnostics/memory/stop")
+def stop_memory_snapshot(x_api_key: str = Header(None)):
+    """Stop tracemalloc and drop the saved snapshot. Requires API key."""
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    stop_memory_tracing()
+    return {"success": True}
+
+
+@app.get("/api/admin/diagnostics/spans")
+def get_spans(x_api_key: str = Header(None)):
+    """Get timings for load_data, parse_message and save_data. Requires API key."""
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    return get_span_stats()
+
+
+@app.post("/api/admin/diagnostics/spans")
+def toggle_spans(request: SpansRequest, x_api_key: str = Header(None)):
+    """Enable or disable hot-path span recording. Requires API key."""
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    set_spans_enabled(request.enabled, request.reset)
+    return get_span_stats()
+
+
+@app.get("/api/admin/diagnostics/caches")
+def get_caches(x_api_key: str = Header(None)):
+    """Report in-memory cache sizes. Requires API key."""
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    return {
+        "storage": get_cache_stats(),
+        "recent_updates": len(recent_updates),
+        "snapshot_cache": len(snapshot_cache["results"]),
+        "projection_cached": projection_cache["result"] is not None,
+        "open_archives": get_open_archive_stats(),
+        "ingest_queue": ingest_queue.stats(),
+        "compressed_responses": get_compression_cache_stats(),
+    }
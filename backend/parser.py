@@ -1,8 +1,11 @@
 import re
 from datetime import datetime
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 from dateutil import parser as date_parser
 
+from aliases import normalize_name
+from diagnostics import traced
+
 
 class ParseError(Exception):
     """Raised when message parsing fails."""
@@ -10,9 +13,12 @@ class ParseError(Exception):
     pass
 
 
-def parse_message(message: str, year: int = None) -> dict:
+@traced("parse_message")
+def parse_message(message: str, year: int = None, aliases: Optional[Dict[str, str]] = None) -> dict:
     """
     Parse a daily update message.
+    If an alias index is given (see aliases.build_alias_index), names are
+    mapped to canonical player names and unmatched names are reported.
 
     Input format:
         July 17
@@ -24,7 +30,8 @@ def parse_message(message: str, year: int = None) -> dict:
     Returns:
         {
             "date": "2025-07-17",
-            "scores": {"Pepo": 12, "Mene": 10, "Josh": 9, "Pocho": 8}
+            "scores": {"Pepo": 12, "Mene": 10, "Josh": 9, "Pocho": 8},
+            "unknown_players": []
         }
     """
     if year is None:
@@ -41,14 +48,23 @@ def parse_message(message: str, year: int = None) -> dict:
 
     # Parse scores from remaining lines
     scores = {}
+    unknown_players = []
     for line in lines[1:]:
         name, score = _parse_score_line(line)
+        if aliases:
+            canonical = aliases.get(normalize_name(name))
+            if canonical is None:
+                unknown_players.append(name)
+            else:
+                name = canonical
+        if name in scores:
+            raise ParseError(f"Duplicate score for '{name}'")
         scores[name] = score
 
     if not scores:
         raise ParseError("No valid scores found")
 
-    return {"date": date, "scores": scores}
+    return {"date": date, "scores": scores, "unknown_players": unknown_players}
 
 
 def _parse_date(date_str: str, year: int) -> str:
@@ -0,0 +1,100 @@
+"""
+Monte Carlo projection of final standings and payouts.
+
+Each player's remaining days are simulated from their own history of daily
+gains over the allowed values {0, 1, 2, 4}. Totals for all players and trials
+are drawn at once: the sum of D independent daily gains only depends on how
+many days land on each value, which is a single multinomial draw.
+"""
+import os
+from datetime import date
+from typing import Dict, List
+
+import numpy as np
+
+GAIN_VALUES = np.array([0, 1, 2, 4])
+CHALLENGE_END_DATE = os.getenv("CHALLENGE_END_DATE", "2026-06-10")
+BET_AMOUNT = 20
+FREE_RIDER = "Mene"
+DISTRIBUTION = [50, 35, 10, 5, 0]  # % of the pot by finish position
+LAST_PLACE_PENALTY = 10
+DEFAULT_TRIALS = 20000
+
+
+def _gain_probabilities(entries: List[dict], players: List[str]) -> np.ndarray:
+    """
+    Estimate each player's daily gain distribution from consecutive entries.
+    Add-one smoothing keeps every outcome possible for players with short histories.
+    Returns a (players, gain values) matrix whose rows sum to 1.
+    """
+    counts = np.ones((len(players), len(GAIN_VALUES)))
+    value_index = {int(v): i for i, v in enumerate(GAIN_VALUES)}
+    for prev, current in zip(entries, entries[1:]):
+        for p, player in enumerate(players):
+            if player in prev["scores"] and player in current["scores"]:
+                gain = current["scores"][player] - prev["scores"][player]
+                if gain in value_index:
+                    counts[p, value_index[gain]] += 1
+    return counts / counts.sum(axis=1, keepdims=True)
+
+
+def simulate_standings(
+    entries: List[dict],
+    end_date: str = CHALLENGE_END_DATE,
+    trials: int = DEFAULT_TRIALS,
+    seed: int = 0,
+) -> Dict:
+    """
+    Simulate the rest of the challenge and summarize finish positions and payouts.
+    Ties in a trial are broken at random.
+    """
+    latest = entries[-1]
+    players = list(latest["scores"].keys())
+    current = np.array([latest["scores"][p] for p in players])
+    remaining_days = max((date.fromisoformat(end_date) - date.fromisoformat(latest["date"])).days, 0)
+
+    rng = np.random.default_rng(seed)
+    probabilities = _gain_probabilities(entries, players)
+
+    # (trials, players, gain values) day counts -> (trials, players) final scores
+    day_counts = rng.multinomial(remaining_days, probabilities, size=(trials, len(players)))
+    finals = current + day_counts @ GAIN_VALUES
+
+    # Position 0 is first place; jitter below 1 point only reorders ties
+    jittered = finals + rng.random(finals.shape)
+    order = np.argsort(-jittered, axis=1)
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.arange(len(players)), axis=1)
+
+    # position_probs[p, k] = P(player p finishes in position k)
+    position_probs = np.zeros((len(players), len(players)))
+    for p in range(len(players)):
+        position_probs[p] = np.bincount(positions[:, p], minlength=len(players)) / trials
+
+    betting_players = [p for p in players if p != FREE_RIDER]
+    pot = len(betting_players) * BET_AMOUNT
+    payout_by_position = np.zeros(len(players))
+    shares = DISTRIBUTION[:len(players)]
+    payout_by_position[:len(shares)] = np.array(shares) * pot / 100
+    expected_payouts = position_probs @ payout_by_position
+
+    return {
+        "date": latest["date"],
+        "end_date": end_date,
+        "remaining_days": remaining_days,
+        "trials": trials,
+        "pot": pot,
+        "players": [
+            {
+                "name": player,
+                "score": int(current[p]),
+                "expected_final_score": round(float(finals[:, p].mean()), 1),
+                "position_probabilities": [round(float(x), 4) for x in position_probs[p]],
+                "win_probability": round(float(position_probs[p, 0]), 4),
+                "last_place_probability": round(float(position_probs[p, -1]), 4),
+                "expected_payout": round(float(expected_payouts[p]), 2),
+                "expected_penalty": round(float(position_probs[p, -1] * LAST_PLACE_PENALTY), 2),
+            }
+            for p, player in enumerate(players)
+        ],
+    }
@@ -1,8 +1,13 @@
 import json
 import os
+from bisect import bisect_right
 import shutil
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+
+from aliases import build_alias_index
+from diagnostics import traced
+from tally import TallyError, apply_ballot, empty_tally, encode_ballot, get_winner
 
 DATA_DIR = Path(os.getenv("DATA_DIR", Path(__file__).parent))
 DATA_FILE = DATA_DIR / "data.json"
@@ -27,6 +32,34 @@ def _get_empty_data() -> dict:
     return {"entries": []}
 
 
+# Parsed data.json shared by read-only helpers, keyed by data revision.
+# Bumped on every save so writes within the same mtime tick still invalidate.
+_data_write_count = 0
+_data_cache = {"revision": None, "data": None}
+_date_index = {"entries": None, "dates": []}  # keyed by the parsed entries list
+
+
+def _data_revision() -> Tuple[int, Optional[int], Optional[int]]:
+    try:
+        stat = DATA_FILE.stat()
+    except FileNotFoundError:
+        return (_data_write_count, None, None)
+    return (_data_write_count, stat.st_mtime_ns, stat.st_size)
+
+
+def _format_revision(revision: Tuple[int, Optional[int], Optional[int]]) -> str:
+    count, mtime_ns, size = revision
+    if mtime_ns is None:
+        return f"{count}-empty"
+    return f"{count}-{mtime_ns}-{size}"
+
+
+def get_data_revision() -> str:
+    """Return an opaque token that changes whenever data.json is rewritten."""
+    return _format_revision(_data_revision())
+
+
+@traced("load_data")
 def load_data() -> dict:
     """Load data from JSON file. Returns empty structure if file doesn't exist."""
     if not DATA_FILE.exists():
@@ -42,6 +75,28 @@ def load_data() -> dict:
     return data
 
 
+def load_data_cached() -> dict:
+    """
+    Load data, reusing the last parse while data.json is unchanged.
+    The returned dict is shared: callers must not mutate it.
+    """
+    return load_data_versioned()[1]
+
+
+def load_data_versioned() -> Tuple[str, dict]:
+    """
+    Get (revision, data) from the shared parse for caching results derived from it.
+    The revision is read before loading, so a concurrent write can only make the
+    data newer than its revision, which just causes one extra rebuild later.
+    """
+    revision = _data_revision()
+    cached = _data_cache
+    if cached["revision"] != revision:
+        cached = {"revision": revision, "data": load_data()}
+        _data_cache.update(cached)
+    return _format_revision(cached["revision"]), cached["data"]
+
+
 def load_profiles() -> Dict[str, dict]:
     """Load player profiles from JSON file. Returns empty dict if missing."""
     if not PROFILES_FILE.exists():
@@ -65,25 +120,54 @@ def load_profiles() -> Dict[str, dict]:
     return normalized
 
 
+_alias_index = {"revision": None, "index": {}}
+
+
+def get_profiles_revision() -> str:
+    """Return an opaque token that changes whenever profiles.json is rewritten."""
+    try:
+        stat = PROFILES_FILE.stat()
+    except FileNotFoundError:
+        return "empty"
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def get_alias_index() -> Dict[str, str]:
+    """
+    Get the normalized name -> player index, rebuilt only when profiles.json changes.
+    Profiles may list extra spellings under "aliases".
+    """
+    revision = get_profiles_revision()
+    if _alias_index["revision"] != revision:
+        _alias_index["index"] = build_alias_index(load_profiles())
+        _alias_index["revision"] = revision
+    return _alias_index["index"]
+
+
+@traced("save_data")
 def save_data(data: dict) -> None:
     """Save data to JSON file."""
+    global _data_write_count
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     with open(DATA_FILE, "w") as f:
         json.dump(data, f, indent=2)
+    _data_write_count += 1
 
 
 def add_entry(date: str, scores: Dict[str, int]) -> bool:
     """
     Add a new entry. If date already exists, update it.
     Returns True if new entry, False if updated existing.
+    Skips the write entirely when the stored scores are already identical.
     """
     data = load_data()
 
     # Check if date already exists
     for entry in data["entries"]:
         if entry["date"] == date:
-            entry["scores"] = scores
-            save_data(data)
+            if entry["scores"] != scores:
+                entry["scores"] = scores
+                save_data(data)
             return False
 
     # Add new entry
@@ -98,7 +182,7 @@ def add_entry(date: str, scores: Dict[str, int]) -> bool:
 
 def get_latest_entry() -> Optional[dict]:
     """Get the most recent entry, or None if no entries exist."""
-    data = load_data()
+    data = load_data_cached()
     if not data["entries"]:
         return None
     return data["entries"][-1]
@@ -106,7 +190,7 @@ def get_latest_entry() -> Optional[dict]:
 
 def get_previous_entry(date: str) -> Optional[dict]:
     """Get the entry before the given date, or None if not found."""
-    data = load_data()
+    data = load_data_cached()
     entries = data["entries"]
 
     for i, entry in enumerate(entries):
@@ -116,10 +200,55 @@ def get_previous_entry(date: str) -> Optional[dict]:
     return None
 
 
+def get_entry_dates(entries: Optional[List[dict]] = None) -> List[str]:
+    """
+    Get the sorted list of entry dates for entries (default: the current data),
+    rebuilt only when given a different parse.
+    """
+    if entries is None:
+        entries = load_data_cached()["entries"]
+    index = _date_index
+    if index["entries"] is not entries:
+        index = {"entries": entries, "dates": [entry["date"] for entry in entries]}
+        _date_index.update(index)
+    return index["dates"]
+
+
+def get_snapshot_index(as_of: str, entries: Optional[List[dict]] = None) -> Optional[int]:
+    """
+    Get the index of the last entry on or before the given date.
+    Returns None if every entry is after it (or there are no entries).
+    """
+    idx = bisect_right(get_entry_dates(entries), as_of) - 1
+    return idx if idx >= 0 else None
+
+
+def get_cache_stats() -> dict:
+    """Report the size of the in-memory data caches."""
+    cached = _data_cache["data"]
+    return {
+        "data_cache": {
+            "loaded": cached is not None,
+            "entries": len(cached["entries"]) if cached else 0,
+        },
+        "date_index": {"dates": len(_date_index["dates"])},
+        "alias_index": {"names": len(_alias_index["index"])},
+        "data_revision": get_data_revision(),
+    }
+
+
 def entry_exists(date: str) -> bool:
     """Check if an entry exists for the given date."""
-    data = load_data()
-    return any(entry["date"] == date for entry in data["entries"])
+    return get_entry(date) is not None
+
+
+def get_entry(date: str) -> Optional[dict]:
+    """Get the entry for the given date, or None if not found."""
+    data = load_data_cached()
+    for entry in data["entries"]:
+        if entry["date"] == date:
+            return entry
+    return None
 
 
 # Vote storage functions
@@ -127,6 +256,9 @@ def entry_exists(date: str) -> bool:
 # Environment variable format: {"CODE1":"Name1","CODE2":"Name2",...}
 VOTE_CODES_ENV = os.getenv("VOTE_CODES")
 
+# Bumped on every votes/history save (see get_votes_revision)
+_votes_write_count = 0
+
 
 DEFAULT_OPTIONS = [
     {"key": "ten", "label": "$10"},
@@ -197,20 +329,39 @@ def load_votes() -> dict:
         if code in persisted.get("vote_codes", {}):
             # Preserve voted status from persisted data
             code_data["voted"] = persisted["vote_codes"][code].get("voted")
+            if "ballot" in persisted["vote_codes"][code]:
+                code_data["ballot"] = persisted["vote_codes"][code]["ballot"]
 
     env_data["vote_counts"] = persisted.get("vote_counts", {"ten": 0, "twenty": 0, "thirty": 0})
     # Preserve is_active, topic, and options from persisted data if present
     env_data["is_active"] = persisted.get("is_active", True)
     env_data["topic"] = persisted.get("topic", env_data["topic"])
     env_data["options"] = persisted.get("options", env_data["options"])
+    for key in ("method", "ballot_counts", "rounds"):
+        if key in persisted:
+            env_data[key] = persisted[key]
     return env_data
 
 
 def save_votes(data: dict) -> None:
     """Save votes data to JSON file."""
+    global _votes_write_count
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     with open(VOTES_FILE, "w") as f:
         json.dump(data, f, indent=2)
+    _votes_write_count += 1
+
+
+def get_votes_revision() -> str:
+    """Return an opaque token that changes whenever votes.json or votes_history.json is rewritten."""
+    parts = [str(_votes_write_count)]
+    for path in (VOTES_FILE, VOTES_HISTORY_FILE):
+        try:
+            stat = path.stat()
+            parts.append(f"{stat.st_mtime_ns}-{stat.st_size}")
+        except FileNotFoundError:
+            parts.append("empty")
+    return "-".join(parts)
 
 
 def get_vote_counts() -> dict:
@@ -219,9 +370,11 @@ def get_vote_counts() -> dict:
     return data["vote_counts"]
 
 
-def submit_vote(code: str, choice: str) -> dict:
+def submit_vote(code: str, choices: List[str]) -> dict:
     """
     Submit a vote using a secret code.
+    choices holds one option key for plurality votes, the approved keys for
+    approval votes, or keys in preference order for ranked votes.
     Returns dict with 'success', 'name', or 'error'.
     """
     data = load_votes()
@@ -230,10 +383,12 @@ def submit_vote(code: str, choice: str) -> dict:
     if not data.get("is_active", False):
         return {"error": "voting_closed"}
 
-    # Validate choice against current options
-    valid_choices = [opt["key"] for opt in data.get("options", DEFAULT_OPTIONS)]
-    if choice not in valid_choices:
-        return {"error": "invalid_choice"}
+    # Validate choices against current options
+    data.setdefault("options", DEFAULT_OPTIONS)
+    try:
+        ballot = encode_ballot(data["options"], choices, data.get("method", "plurality"))
+    except TallyError as e:
+        return {"error": str(e)}
 
     code_upper = code.upper().strip()
 
@@ -246,8 +401,9 @@ def submit_vote(code: str, choice: str) -> dict:
         return {"error": "already_voted", "name": code_data["name"]}
 
     # Record the vote
-    code_data["voted"] = choice
-    data["vote_counts"][choice] += 1
+    code_data["voted"] = choices[0]
+    code_data["ballot"] = ballot
+    apply_ballot(data, ballot)
     save_votes(data)
 
     return {"success": True, "name": code_data["name"]}
@@ -260,9 +416,10 @@ def reset_votes() -> None:
     # Reset all vote codes to not voted
     for code_data in data["vote_codes"].values():
         code_data["voted"] = None
+        code_data.pop("ballot", None)
 
-    # Reset vote counts
-    data["vote_counts"] = {"ten": 0, "twenty": 0, "thirty": 0}
+    # Reset tallies
+    data.update(empty_tally(data.get("options", DEFAULT_OPTIONS), data.get("method", "plurality")))
 
     save_votes(data)
 
@@ -284,9 +441,11 @@ def load_votes_history() -> dict:
 
 def save_votes_history(data: dict) -> None:
     """Save vote history to JSON file."""
+    global _votes_write_count
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     with open(VOTES_HISTORY_FILE, "w") as f:
         json.dump(data, f, indent=2)
+    _votes_write_count += 1
 
 
 def archive_vote() -> dict:
@@ -309,30 +468,27 @@ def archive_vote() -> dict:
         if code_data["voted"] is not None:
             voters.append(code_data["name"])
 
-    # Determine winner
+    # Determine winner from the running tally
+    votes.setdefault("options", DEFAULT_OPTIONS)
     vote_counts = votes["vote_counts"]
-    total_votes = sum(vote_counts.values())
-
-    max_votes = max(vote_counts.values()) if vote_counts else 0
-    winners = []
-    for opt in votes.get("options", DEFAULT_OPTIONS):
-        if vote_counts.get(opt["key"], 0) == max_votes:
-            winners.append(opt["label"])
-
-    winner = winners[0] if len(winners) == 1 else None
+    total_votes = len(voters)
+    winner = get_winner(votes)
 
     # Create history record
     pacific_tz = ZoneInfo("America/Los_Angeles")
     record = {
         "id": str(uuid.uuid4()),
         "topic": votes.get("topic", "Unknown topic"),
-        "options": votes.get("options", DEFAULT_OPTIONS),
+        "options": votes["options"],
+        "method": votes.get("method", "plurality"),
         "finalized_at": datetime.now(pacific_tz).isoformat(),
         "vote_counts": vote_counts,
         "winner": winner,
         "total_votes": total_votes,
         "voters": voters,
     }
+    if "rounds" in votes:
+        record["rounds"] = votes["rounds"]
 
     # Save to history
     history = load_votes_history()
@@ -346,9 +502,9 @@ def archive_vote() -> dict:
     return {"success": True, "archived": record}
 
 
-def create_vote(topic: str, options: list) -> dict:
+def create_vote(topic: str, options: list, method: str = "plurality") -> dict:
     """
-    Create a new active vote with given topic and options.
+    Create a new active vote with given topic, options and tallying method.
     Returns success or error dict.
     """
     votes = load_votes()
@@ -356,17 +512,19 @@ def create_vote(topic: str, options: list) -> dict:
     if votes.get("is_active", False):
         return {"error": "vote_already_active"}
 
-    # Build vote_counts from options
-    vote_counts = {opt["key"]: 0 for opt in options}
-
     # Reset all vote codes
     for code_data in votes["vote_codes"].values():
         code_data["voted"] = None
+        code_data.pop("ballot", None)
+
+    # Drop tally fields left over from a previous method
+    votes.pop("ballot_counts", None)
+    votes.pop("rounds", None)
 
     votes["is_active"] = True
     votes["topic"] = topic
     votes["options"] = options
-    votes["vote_counts"] = vote_counts
+    votes.update(empty_tally(options, method))
 
     save_votes(votes)
     return {"success": True}
@@ -0,0 +1,142 @@
+"""
+Vote tallying for plurality, approval and ranked-choice (instant runoff) votes.
+
+Ballots are encoded as lists of option indices (in preference order for
+ranked votes). Tallies are updated incrementally as each ballot arrives so
+reads never recount individual ballots:
+- plurality/approval: vote_counts[key] += 1 for each chosen option
+- ranked: identical ballots are grouped in ballot_counts ("0,2,1" -> n) and
+  the runoff rounds are recomputed from those groups and stored; a runoff
+  that ends with all remaining options tied has no winner
+"""
+from typing import Dict, List, Optional
+
+METHODS = ("plurality", "approval", "ranked")
+
+
+class TallyError(Exception):
+    """Raised when a ballot is not valid for the vote's method and options."""
+
+    pass
+
+
+def empty_tally(options: list, method: str = "plurality") -> dict:
+    """Build the initial tally fields for a vote."""
+    tally = {
+        "method": method,
+        "vote_counts": {opt["key"]: 0 for opt in options},
+    }
+    if method == "ranked":
+        tally["ballot_counts"] = {}
+        tally["rounds"] = []
+    return tally
+
+
+def encode_ballot(options: list, choices: List[str], method: str = "plurality") -> List[int]:
+    """Validate choices against the options and encode them as option indices."""
+    index = {opt["key"]: i for i, opt in enumerate(options)}
+    if not choices or any(choice not in index for choice in choices):
+        raise TallyError("invalid_choice")
+    if len(set(choices)) != len(choices):
+        raise TallyError("invalid_choice")
+    if method == "plurality" and len(choices) != 1:
+        raise TallyError("invalid_choice")
+    return [index[choice] for choice in choices]
+
+
+def apply_ballot(votes: dict, ballot: List[int]) -> None:
+    """Add one encoded ballot to the vote's running tally."""
+    options = votes["options"]
+    method = votes.get("method", "plurality")
+    counts = votes["vote_counts"]
+
+    if method == "approval":
+        for i in ballot:
+            counts[options[i]["key"]] = counts.get(options[i]["key"], 0) + 1
+        return
+
+    # Plurality and ranked votes both count first preferences
+    first = options[ballot[0]]["key"]
+    counts[first] = counts.get(first, 0) + 1
+
+    if method == "ranked":
+        encoded = ",".join(str(i) for i in ballot)
+        ballot_counts = votes.setdefault("ballot_counts", {})
+        ballot_counts[encoded] = ballot_counts.get(encoded, 0) + 1
+        votes["rounds"] = instant_runoff(ballot_counts, options)
+
+
+def instant_runoff(ballot_counts: Dict[str, int], options: list) -> List[dict]:
+    """
+    Run instant runoff over grouped ballots.
+    Each round lists the counts for remaining options and the option eliminated.
+    Ties for last place eliminate the option listed later, but when every
+    remaining option is tied the runoff stops there: the final round is a tie
+    and there is no winner.
+    """
+    ballots = [([int(i) for i in encoded.split(",")], n) for encoded, n in ballot_counts.items()]
+    remaining = set(range(len(options)))
+    rounds = []
+
+    while remaining:
+        counts = {i: 0 for i in remaining}
+        exhausted = 0
+        for ballot, n in ballots:
+            top = next((i for i in ballot if i in remaining), None)
+            if top is None:
+                exhausted += n
+            else:
+                counts[top] += n
+
+        active = sum(counts.values())
+        leader = max(counts, key=lambda i: (counts[i], -i))
+        record = {
+            "counts": {options[i]["key"]: counts[i] for i in sorted(counts)},
+            "exhausted": exhausted,
+            "eliminated": None,
+        }
+        rounds.append(record)
+
+        if active == 0 or counts[leader] * 2 > active or len(remaining) == 1:
+            break
+
+        loser = min(counts, key=lambda i: (counts[i], -i))
+        if counts[loser] == counts[leader]:
+            break  # all tied: eliminating by option order would pick the winner
+        record["eliminated"] = options[loser]["key"]
+        remaining.remove(loser)
+
+    return rounds
+
+
+def get_winner(votes: dict) -> Optional[str]:
+    """
+    Get the winning option label, or None if there is no single winner.
+    Ranked votes use the final runoff round, so a runoff ending in a tie has no winner.
+    """
+    options = votes.get("options", [])
+    counts = votes.get("vote_counts", {})
+
+    if votes.get("method") == "ranked":
+        rounds = votes.get("rounds") or []
+        if not rounds:
+            return None
+        counts = rounds[-1]["counts"]
+
+    if not counts:
+        return None
+    max_votes = max(counts.values())
+    winners = [opt["label"] for opt in options if counts.get(opt["key"]) == max_votes]
+    return winners[0] if len(winners) == 1 else None
+
+
+def get_standings(votes: dict) -> dict:
+    """Summarize live standings from the stored tally."""
+    standings = {
+        "method": votes.get("method", "plurality"),
+        "vote_counts": votes.get("vote_counts", {}),
+        "leader": get_winner(votes),
+    }
+    if standings["method"] == "ranked":
+        standings["rounds"] = votes.get("rounds", [])
+    return standings
@@ -18,14 +18,14 @@ export async function fetchProfiles() {
   return response.json();
 }
 
-export async function submitUpdate(message, apiKey, force = false) {
+export async function submitUpdate(message, apiKey, force = false, acceptUnknown = false) {
   const response = await fetch(`${API_BASE}/api/update`, {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json',
       'X-API-Key': apiKey,
     },
-    body: JSON.stringify({ message, force }),
+    body: JSON.stringify({ message, force, accept_unknown: acceptUnknown }),
   });
 
   const data = await response.json();
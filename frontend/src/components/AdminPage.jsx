@@ -17,7 +17,7 @@ export default function AdminPage() {
   const [message, setMessage] = useState('');
   const [status, setStatus] = useState(null); // { type: 'success' | 'error' | 'warning', text: string }
   const [loading, setLoading] = useState(false);
-  const [pendingOverwrite, setPendingOverwrite] = useState(null); // { message, date }
+  const [pendingOverwrite, setPendingOverwrite] = useState(null); // { message, date, overwrite, unknownPlayers }
   const [latestEntry, setLatestEntry] = useState(null);
   const [loadingExample, setLoadingExample] = useState(true);
 
@@ -84,10 +84,12 @@ export default function AdminPage() {
     setStatus(null);
   };
 
-  const handleSubmit = async (e, force = false) => {
+  const handleSubmit = async (e, confirmed = false) => {
     if (e) e.preventDefault();
 
-    const msgToSubmit = force ? pendingOverwrite?.message : message;
+    const msgToSubmit = confirmed ? pendingOverwrite?.message : message;
+    const force = confirmed && Boolean(pendingOverwrite?.overwrite);
+    const acceptUnknown = confirmed && pendingOverwrite?.unknownPlayers?.length > 0;
 
     if (!msgToSubmit?.trim()) {
       setStatus({ type: 'error', text: t('errors.emptyMessage') });
@@ -103,11 +105,16 @@ export default function AdminPage() {
     setStatus(null);
 
     try {
-      const result = await submitUpdate(msgToSubmit, apiKey, force);
+      const result = await submitUpdate(msgToSubmit, apiKey, force, acceptUnknown);
 
       if (result.requires_confirmation) {
-        // Entry exists, ask for confirmation
-        setPendingOverwrite({ message: msgToSubmit, date: result.date });
+        // Entry exists or players are unknown, ask for confirmation
+        setPendingOverwrite({
+          message: msgToSubmit,
+          date: result.date,
+          overwrite: result.overwrite,
+          unknownPlayers: result.unknown_players,
+        });
         setStatus({
           type: 'warning',
           text: result.message,
@@ -201,15 +208,24 @@ export default function AdminPage() {
 
       {pendingOverwrite && (
         <div className="confirmation-dialog">
-          <p>{t('confirmation.exists', { date: pendingOverwrite.date })}</p>
-          <p>{t('confirmation.overwrite')}</p>
+          {pendingOverwrite.unknownPlayers?.length > 0 && (
+            <p>{t('confirmation.unknownPlayers', { players: pendingOverwrite.unknownPlayers.join(', ') })}</p>
+          )}
+          {pendingOverwrite.overwrite && (
+            <>
+              <p>{t('confirmation.exists', { date: pendingOverwrite.date })}</p>
+              <p>{t('confirmation.overwrite')}</p>
+            </>
+          )}
           <div className="confirmation-buttons">
             <button
               className="confirm-btn"
               onClick={handleConfirmOverwrite}
               disabled={loading}
             >
-              {loading ? t('confirmation.overwriting') : t('confirmation.yesOverwrite')}
+              {pendingOverwrite.overwrite
+                ? (loading ? t('confirmation.overwriting') : t('confirmation.yesOverwrite'))
+                : (loading ? t('confirmation.saving') : t('confirmation.yesAdd'))}
             </button>
             <button
               className="cancel-btn"